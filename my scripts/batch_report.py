@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from full_report import fetch_market_data, load_inputs, build_report, upload_report, add_payload_arg
+from payload_format import encode_payload
+
+# ================================
+#   CONFIG
+# ================================
+# Manifest format (paths are relative to the manifest file):
+# {
+#   "portfolios": [
+#     {"id": "<firestore doc id>", "yields_file": "a/yields_data.json",
+#      "transactions_file": "a/all_transactions.json",
+#      "output_file": "out/a.json",   # optional, write the report locally
+#      "upload": true}                # optional, default true
+#   ]
+# }
+DEFAULT_WORKERS = os.cpu_count() or 2
+
+# ================================
+#   Worker
+# ================================
+_market = None
+_payload_format = "rows"
+
+def _init_worker(market, payload_format):
+    # Market data is shipped once per worker process, not once per portfolio
+    global _market, _payload_format
+    _market = market
+    _payload_format = payload_format
+
+def _build_one(entry):
+    yields_data, trans_data = load_inputs(entry["yields_file"], entry["transactions_file"])
+    if yields_data is None:
+        raise FileNotFoundError(f"Input files missing for {entry['id']}")
+    return encode_payload(build_report(yields_data, trans_data, _market), _payload_format)
+
+# ================================
+#   Batch
+# ================================
+def load_manifest(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    base = os.path.dirname(os.path.abspath(path))
+    entries = []
+    for entry in manifest.get("portfolios", []):
+        entry = dict(entry)
+        for key in ("yields_file", "transactions_file", "output_file"):
+            if entry.get(key):
+                entry[key] = os.path.join(base, entry[key])
+        entries.append(entry)
+    return entries
+
+def publish(entry, final_output, allow_upload=True):
+    """Writes and/or uploads one portfolio; a failure here never affects the others."""
+    ok = True
+    if entry.get("output_file"):
+        os.makedirs(os.path.dirname(entry["output_file"]), exist_ok=True)
+        with open(entry["output_file"], 'w', encoding='utf-8') as f:
+            json.dump(final_output, f, ensure_ascii=False, indent=4)
+        print(f"   💾 Saved {entry['id']} -> {entry['output_file']}")
+    if allow_upload and entry.get("upload", True):
+        ok = upload_report(final_output, entry["id"])
+    return ok
+
+def run_batch(entries, workers=DEFAULT_WORKERS, allow_upload=True, payload_format="rows"):
+    start_time = time.time()
+    print(f"🚀 Batch report for {len(entries)} portfolios ({workers} workers)")
+
+    # 1. Shared market data, fetched once
+    market = fetch_market_data()
+    print(f"   ⏱️ Market data ready in {time.time() - start_time:.1f}s")
+
+    # 2. Per-portfolio aggregation in parallel, results published as they arrive
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(market, payload_format)) as pool:
+        futures = {pool.submit(_build_one, entry): entry for entry in entries}
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                final_output = future.result()
+            except Exception as e:
+                print(f"❌ {entry['id']}: report failed ({e})")
+                failed.append(entry["id"])
+                continue
+            try:
+                if not publish(entry, final_output, allow_upload):
+                    failed.append(entry["id"])
+            except Exception as e:
+                print(f"❌ {entry['id']}: publish failed ({e})")
+                failed.append(entry["id"])
+
+    elapsed = time.time() - start_time
+    print(f"🏁 {len(entries) - len(failed)}/{len(entries)} portfolios done in {elapsed:.2f} seconds")
+    if failed:
+        print(f"⚠️ Failed: {failed}")
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("manifest", help="JSON manifest listing the portfolios and their input files.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--no-upload", action="store_true", help="Only write output files, skip Firebase.")
+    add_payload_arg(parser)
+    args = parser.parse_args()
+
+    failed = run_batch(load_manifest(args.manifest), workers=args.workers, allow_upload=not args.no_upload,
+                       payload_format=args.payload_format)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
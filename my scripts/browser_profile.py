@@ -0,0 +1,132 @@
+import os, csv, time
+from contextlib import contextmanager
+from datetime import datetime
+from selenium.webdriver.chrome.options import Options
+from local_state import state_path
+
+# ================================
+#   CONFIG
+# ================================
+BROWSER_CACHE_DIR = state_path("browser")
+TIMINGS_FILE = os.path.join(BROWSER_CACHE_DIR, "timings.csv")
+
+WINDOW_SIZE = "1920,1080"  # ui-grid only renders rows that fit the viewport
+
+# Anything the scrapers never read: images, fonts, media and third-party trackers
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.ico", "*.webp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+]
+
+# ================================
+#   ARGS
+# ================================
+def add_browser_args(parser):
+    parser.add_argument("--headed", action="store_true",
+                        help="Show the browser window instead of running headless.")
+    parser.add_argument("--no-block", action="store_true",
+                        help="Load images, fonts and third-party assets too.")
+
+# ================================
+#   PROFILE
+# ================================
+def profile_dir(name):
+    path = os.path.join(BROWSER_CACHE_DIR, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def build_chrome_options(profile_name, headless=True, block_resources=True):
+    """Chrome options for the scrapers: persistent profile, optionally headless and without images."""
+    chrome_options = Options()
+    chrome_options.add_argument(f"--user-data-dir={profile_dir(profile_name)}")
+    chrome_options.add_argument("--log-level=3")
+    chrome_options.add_argument("--silent")
+    chrome_options.add_argument(f"--window-size={WINDOW_SIZE}")
+
+    if headless:
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--disable-gpu")
+
+    if block_resources:
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--disable-background-networking")
+        chrome_options.add_argument("--disable-component-update")
+
+    return chrome_options
+
+def apply_resource_blocking(driver):
+    """Blocks non-essential requests through CDP; must run before the first driver.get()."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        print(f"   🚫 Blocking {len(BLOCKED_URL_PATTERNS)} resource patterns")
+    except Exception as e:
+        print(f"   ⚠️ Could not enable resource blocking: {e}")
+
+def allow_downloads(driver, download_dir):
+    """Headless Chrome ignores the download prefs unless told explicitly over CDP."""
+    try:
+        driver.execute_cdp_cmd("Browser.setDownloadBehavior", {"behavior": "allow", "downloadPath": download_dir})
+    except Exception as e:
+        print(f"   ⚠️ Could not set download behavior: {e}")
+
+def profile_mode(headless, block_resources):
+    return f"{'headless' if headless else 'headed'}{'+blocked' if block_resources else ''}"
+
+# ================================
+#   TIMING
+# ================================
+class RunTimer:
+    """Wall-clock time per phase, appended to TIMINGS_FILE so profile modes can be compared across runs."""
+
+    def __init__(self, script_name, mode):
+        self.script_name = script_name
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, label):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[label] = self.phases.get(label, 0.0) + time.perf_counter() - start
+
+    def report(self):
+        total = time.perf_counter() - self.started
+        page_load = sum(self.phases.values())
+        print(f"⏱️ Timing ({self.mode}): total {total:.1f}s, page loads {page_load:.1f}s")
+        for label, seconds in self.phases.items():
+            print(f"   {label:<24} {seconds:6.1f}s")
+
+        previous = self._previous_runs()
+        self._save(total, page_load)
+        for mode, loads in sorted(previous.items()):
+            if mode != self.mode:
+                avg = sum(loads) / len(loads)
+                print(f"   vs {mode} (avg of {len(loads)} runs): page loads {avg:.1f}s ({avg - page_load:+.1f}s saved)")
+
+    def _previous_runs(self):
+        runs = {}
+        if not os.path.exists(TIMINGS_FILE):
+            return runs
+        with open(TIMINGS_FILE, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if row["script"] == self.script_name:
+                    runs.setdefault(row["mode"], []).append(float(row["page_load_s"]))
+        return runs
+
+    def _save(self, total, page_load):
+        os.makedirs(BROWSER_CACHE_DIR, exist_ok=True)
+        is_new = not os.path.exists(TIMINGS_FILE)
+        with open(TIMINGS_FILE, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(["timestamp", "script", "mode", "total_s", "page_load_s"])
+            writer.writerow([datetime.now().isoformat(timespec="seconds"), self.script_name, self.mode,
+                             f"{total:.2f}", f"{page_load:.2f}"])
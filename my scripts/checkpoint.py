@@ -0,0 +1,76 @@
+import os, json, tempfile
+from datetime import datetime, date
+
+# ================================
+#   UTILS
+# ================================
+def atomic_write_json(path, data):
+    """Writes JSON to a temp file next to `path` and swaps it in, so a crash never leaves half a file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+# ================================
+#   JOURNAL
+# ================================
+class CheckpointJournal:
+    """
+    Records every finished unit of work (a scraped year, an exported file)
+    so a crashed run can pick up from the first missing unit.
+    The journal is removed once the whole run completes, and a journal left
+    over from an earlier day is ignored, since the open year has moved on.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.run_date = date.today().isoformat()
+        self.units = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+            except (ValueError, OSError) as e:
+                print(f"   ⚠️ Ignoring unreadable checkpoint {os.path.basename(path)}: {e}")
+                return
+            if saved.get("run_date") == self.run_date:
+                self.units = saved.get("units", {})
+            else:
+                print(f"   ⚠️ Ignoring stale checkpoint {os.path.basename(path)} from {saved.get('run_date', 'an unknown date')}")
+
+    def is_done(self, unit):
+        return str(unit) in self.units
+
+    def get(self, unit, default=None):
+        entry = self.units.get(str(unit))
+        return entry["data"] if entry else default
+
+    def pending(self, units):
+        return [u for u in units if not self.is_done(u)]
+
+    def mark_done(self, unit, data=None):
+        self.units[str(unit)] = {"done_at": datetime.now().isoformat(timespec="seconds"), "data": data}
+        self._save()
+
+    def discard(self, unit):
+        if self.units.pop(str(unit), None) is not None:
+            self._save()
+
+    def clear(self):
+        self.units = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _save(self):
+        atomic_write_json(self.path, {"run_date": self.run_date, "units": self.units})
+
+    def __len__(self):
+        return len(self.units)
@@ -1,4 +1,5 @@
-import os, pandas as pd, glob, re, json
+import os, sys, time, tracemalloc, argparse, pandas as pd, glob, re, json
+from excel_reader import read_fees_excel, pick_engine, SchemaError, DATE_FORMAT
 
 # ================================
 #   CONFIG
@@ -13,7 +14,31 @@ def extract_year_from_filename(filename):
     match = re.search(r'\d{4}', filename)
     return int(match.group(0)) if match else 2025
 
+def benchmark(files):
+    """Compares the legacy full read with the projected/typed reader: wall time and Python peak memory per file."""
+    def measure(fn, path):
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn(path)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return elapsed, peak / 1024 / 1024
+
+    print(f"⏱️ Benchmark (engine: {pick_engine(files[0]) or 'pandas default'})")
+    print(f"   {'file':<28} {'legacy s':>9} {'new s':>7} {'legacy MB':>10} {'new MB':>7}")
+    for f in files:
+        old_t, old_mb = measure(pd.read_excel, f)
+        new_t, new_mb = measure(read_fees_excel, f)
+        print(f"   {os.path.basename(f):<28} {old_t:9.3f} {new_t:7.3f} {old_mb:10.1f} {new_mb:7.1f}")
+    # Note: tracemalloc only sees Python allocations, so calamine's native buffers are not counted
+
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Time the legacy reader against the projected one instead of converting.")
+    args = parser.parse_args()
+
     print("--- Converting Excels to JSON ---")
     print(f"📂 Working Directory: {TEMP_DIR}")
 
@@ -27,28 +52,45 @@ def main():
         print("ℹ No Excel files found in temp folder.")
         return
 
+    # Skip temporary Excel lock files
+    files = [f for f in files if not os.path.basename(f).startswith("~$")]
+
+    if args.benchmark:
+        benchmark(files)
+        return
+
     all_df = []
+    schema_errors = []
     print(f"🔍 Found {len(files)} files. Processing...")
 
     for f in files:
-        # Skip temporary Excel lock files
-        if os.path.basename(f).startswith("~$"): 
-            continue
-            
         try:
-            df = pd.read_excel(f)
+            df = read_fees_excel(f)
             df['SourceFile'] = os.path.basename(f)
             all_df.append(df)
             print(f"   ✅ Loaded: {os.path.basename(f)}")
+        except SchemaError as e:
+            schema_errors.append(str(e))
+            print(f"   ❌ Schema mismatch: {e}")
         except Exception as e: 
             print(f"   ❌ Failed to load {os.path.basename(f)}: {e}")
 
+    # Don't hand a silently partial history to the report
+    if schema_errors:
+        print(f"🛑 {len(schema_errors)} file(s) don't match the expected export format. JSON not written.")
+        sys.exit(1)
+
     if all_df:
         full = pd.concat(all_df, ignore_index=True)
         
-        # Ensure dates are strings for JSON serialization
-        if 'תאריך' in full.columns: 
-            full['תאריך'] = full['תאריך'].astype(str)
+        # Footer/summary rows (e.g. 'סה"כ') have no date; the app splits every date, so they can't go out as null
+        undated = full['תאריך'].isna()
+        if undated.any():
+            print(f"   ⚠️ Dropped {int(undated.sum())} row(s) without a parsable date (summary/footer rows)")
+            full = full[~undated]
+
+        # Back to the broker's 'dd/mm/yyyy' text, which full_report.py and the app parse
+        full['תאריך'] = full['תאריך'].dt.strftime(DATE_FORMAT)
         
         # Define output path (inside the temp folder)
         out_path = os.path.join(TEMP_DIR, OUTPUT_FILE)
@@ -1,12 +1,15 @@
-import os, time, json, logging
+import os, sys, time, argparse, logging
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, NoSuchElementException, StaleElementReferenceException
+from checkpoint import CheckpointJournal, atomic_write_json
+from local_state import state_path
+from scrape_history import YIELDS_HISTORY_FILE, add_refresh_arg, load_history, record_year, years_to_fetch
+from browser_profile import add_browser_args, build_chrome_options, apply_resource_blocking, profile_mode, RunTimer
 
 # ================================
 #   CONFIG & CREDENTIALS
@@ -24,6 +27,9 @@ TARGET_DIR = os.path.join(BASE_DIR, "temp")
 
 LOG_DIR = os.path.join(TARGET_DIR, "logs")
 OUTPUT_JSON = os.path.join(TARGET_DIR, "yields_data.json")
+# Per-year progress, so a crash mid-run resumes from the first missing year (not in temp, which the report wipes)
+CHECKPOINT_FILE = state_path("checkpoints", "yields_journal.json")
+YEARS_UNIT = "years_list"
 
 # Create the directories if they don't exist
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -97,12 +103,47 @@ def scrape_table_data(driver, year):
     
     return data
 
+def save_output(all_years_data, journal, complete=True):
+    """Writes the final JSON atomically; the journal is dropped only when no year is missing."""
+    if all_years_data:
+        print(f"💾 Saving JSON file ({len(all_years_data)} total records)...")
+        atomic_write_json(OUTPUT_JSON, all_years_data)
+        if complete:
+            journal.clear()
+        print(f"🎉 Done! File saved at:\n{OUTPUT_JSON}")
+    else:
+        print("⚠️ No data collected.")
+
 # ================================
 #   MAIN SCRIPT
 # ================================
 
 print("--- Starting Yields Export Script (JSON) ---")
 
+parser = argparse.ArgumentParser()
+add_refresh_arg(parser)
+add_browser_args(parser)
+args = parser.parse_args()
+history = load_history(YIELDS_HISTORY_FILE)
+journal = CheckpointJournal(CHECKPOINT_FILE)
+known_years = journal.get(YEARS_UNIT)
+
+def rows_for_year(year_str):
+    """This run's rows if we already have them, otherwise the locally stored history."""
+    if journal.is_done(year_str):
+        return journal.get(year_str, [])
+    entry = history["years"].get(year_str)
+    return entry["data"] if entry else []
+
+if known_years and not journal.pending(years_to_fetch(known_years, history, args.full_refresh)):
+    # Previous run scraped every open year but died before writing the JSON
+    print("♻️ All years found in checkpoint/history. Skipping browser session.")
+    save_output([row for y in known_years for row in rows_for_year(y)], journal)
+    sys.exit(0)
+
+if len(journal):
+    print(f"♻️ Resuming from checkpoint ({len(journal)} completed units).")
+
 if not MY_USERNAME:
     username_input = input("Username: ")
 else:
@@ -113,25 +154,27 @@ if not MY_PASSWORD:
 else:
     password_input = MY_PASSWORD
 
-# Chrome Options
-chrome_options = Options()
-script_profile_dir = os.path.join(TARGET_DIR, "chrome_profile_yields")
-chrome_options.add_argument(f"--user-data-dir={script_profile_dir}")
-chrome_options.add_argument("--log-level=3") 
-chrome_options.add_argument("--silent")
+# Chrome Options (profile lives in the local state dir so it survives the temp cleanup)
+headless, block_resources = not args.headed, not args.no_block
+chrome_options = build_chrome_options("chrome_profile_yields", headless=headless, block_resources=block_resources)
+timer = RunTimer("earnings-loses", profile_mode(headless, block_resources))
 
 driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
 wait = WebDriverWait(driver, 60)
 short_wait = WebDriverWait(driver, 10)
 fast_wait = WebDriverWait(driver, 2)
 
-driver.maximize_window()
+if block_resources:
+    apply_resource_blocking(driver)
+if not headless:
+    driver.maximize_window()
 
 all_years_data = []
 
 try:
     print("🚀 Connecting to site...")
-    driver.get("https://sparkmeitav.ordernet.co.il/#/auth")
+    with timer.phase("login_page"):
+        driver.get("https://sparkmeitav.ordernet.co.il/#/auth")
     
     # --- Login ---
     try:
@@ -203,7 +246,8 @@ try:
         view_select_loc = (By.CSS_SELECTOR, "select[ng-model='yieldsVM.options.selectedView']")
         view_el = wait.until(EC.presence_of_element_located(view_select_loc))
         Select(view_el).select_by_value("string:monthly")
-        wait_for_loader(driver)
+        with timer.phase("monthly_view"):
+            wait_for_loader(driver)
         time.sleep(3)
     except Exception as e:
         print(f"❌ Error setting monthly view: {e}")
@@ -222,8 +266,21 @@ try:
     years_list.sort(reverse=True)
     
     print(f"   Found years: {years_list}")
+    journal.mark_done(YEARS_UNIT, years_list)
+
+    # Closed years never change, so by default only open ones hit the grid
+    fetch_years = years_to_fetch(years_list, history, args.full_refresh)
+    if not args.full_refresh:
+        print(f"   Open years to fetch: {fetch_years} (use --full-refresh to fetch all)")
 
     for year_str in years_list:
+        if year_str not in fetch_years or journal.is_done(year_str):
+            cached_rows = rows_for_year(year_str)
+            all_years_data.extend(cached_rows)
+            source = "checkpoint" if journal.is_done(year_str) else "history"
+            print(f"♻️ Year {year_str} restored from {source} ({len(cached_rows)} records).")
+            continue
+
         try:
             print(f"🔽 Processing year: {year_str}")
             
@@ -233,13 +290,17 @@ try:
             
             # Wait for data load
             time.sleep(3)
-            wait_for_loader(driver)
-            
-            # Scrape
-            year_data = scrape_table_data(driver, year_str)
+            with timer.phase("year_grids"):
+                wait_for_loader(driver)
+
+                # Scrape
+                year_data = scrape_table_data(driver, year_str)
             
+            # An empty grid is still a finished year, otherwise the journal never clears
+            journal.mark_done(year_str, year_data)
             if year_data:
                 all_years_data.extend(year_data)
+                record_year(YIELDS_HISTORY_FILE, history, year_str, year_data)
                 print(f"   ✅ Saved {len(year_data)} records.")
             else:
                 print(f"   ⚠️ No data found for {year_str}")
@@ -248,13 +309,10 @@ try:
             print(f"   ❌ Error processing year {year_str}: {e}")
 
     # --- Save JSON ---
-    if all_years_data:
-        print(f"💾 Saving JSON file ({len(all_years_data)} total records)...")
-        with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
-            json.dump(all_years_data, f, ensure_ascii=False, indent=4)
-        print(f"🎉 Done! File saved at:\n{OUTPUT_JSON}")
-    else:
-        print("⚠️ No data collected.")
+    missing_years = journal.pending(fetch_years)
+    if missing_years:
+        print(f"⚠️ Years still missing: {missing_years}. Rerun to resume from checkpoint.")
+    save_output(all_years_data, journal, complete=not missing_years)
 
 except Exception as main_e:
     print(f"🔥 Critical Error: {main_e}")
@@ -263,4 +321,6 @@ except Exception as main_e:
 finally:
     # input("Press Enter to close...") <-- DELETE OR COMMENT THIS OUT
     if 'driver' in locals():
-        driver.quit()
\ No newline at end of file
+        driver.quit()
+    if 'timer' in locals():
+        timer.report()
\ No newline at end of file
@@ -0,0 +1,130 @@
+import os
+from datetime import date
+import importlib.util
+import pandas as pd
+
+# ================================
+#   Schema
+# ================================
+# Only the columns full_report.py and the app actually read; everything else is dropped at parse time
+DATE_COLUMNS = ['תאריך']
+TEXT_COLUMNS = ['שם נייר']
+NUMERIC_COLUMNS = ['עמלת פעולה', 'עמלות נלוות', 'תמורה בשקלים', 'אומדן מס רווחי הון']
+REPORT_COLUMNS = DATE_COLUMNS + TEXT_COLUMNS + NUMERIC_COLUMNS
+
+# Used by the app only; an export without it is still usable
+OPTIONAL_COLUMNS = ['אומדן מס רווחי הון']
+
+DATE_FORMAT = '%d/%m/%Y'  # Broker export format, and what full_report.py / the app parse
+DATE_TEXT_PATTERN = r'(\d{1,2}/\d{1,2}/\d{4})'
+
+class SchemaError(ValueError):
+    """The broker export no longer has the columns the report depends on."""
+
+# ================================
+#   Engines
+# ================================
+def has_module(name):
+    return importlib.util.find_spec(name) is not None
+
+def pick_engine(path):
+    """calamine (Rust) when installed, else openpyxl in read_only streaming mode; legacy .xls falls back to pandas' default."""
+    if has_module("python_calamine"):
+        return "calamine"
+    if path.lower().endswith(".xlsx") and has_module("openpyxl"):
+        return "openpyxl_stream"
+    return None
+
+def _read_calamine(path):
+    header = pd.read_excel(path, engine="calamine", nrows=0).columns
+    check_schema(header, path)
+    return pd.read_excel(
+        path,
+        engine="calamine",
+        usecols=lambda c: str(c).strip() in REPORT_COLUMNS,
+        dtype={c: str for c in TEXT_COLUMNS},
+    )
+
+def _read_openpyxl_stream(path):
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+        check_schema(header, path)
+
+        # Keep only projected cells while streaming, the rest is never materialized
+        wanted = [(i, name) for i, name in enumerate(header) if name in REPORT_COLUMNS]
+        columns = {name: [] for _, name in wanted}
+        for row in rows:
+            if not any(row):
+                continue
+            for i, name in wanted:
+                columns[name].append(row[i] if i < len(row) else None)
+        return pd.DataFrame(columns)
+    finally:
+        wb.close()
+
+def _read_default(path):
+    header = pd.read_excel(path, nrows=0).columns
+    check_schema(header, path)
+    return pd.read_excel(path, usecols=lambda c: str(c).strip() in REPORT_COLUMNS, dtype={c: str for c in TEXT_COLUMNS})
+
+READERS = {
+    "calamine": _read_calamine,
+    "openpyxl_stream": _read_openpyxl_stream,
+    None: _read_default,
+}
+
+# ================================
+#   Reading
+# ================================
+def check_schema(header, path):
+    header = [str(h).strip() for h in header]
+    missing = [c for c in REPORT_COLUMNS if c not in header and c not in OPTIONAL_COLUMNS]
+    if missing:
+        raise SchemaError(
+            f"{os.path.basename(path)}: missing column(s) {missing}. "
+            f"Found: {header}. The broker export format may have changed."
+        )
+
+def _to_number(series):
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float).fillna(0.0)
+    cleaned = series.astype(str).str.replace(',', '', regex=False).str.replace('%', '', regex=False).str.strip()
+    return pd.to_numeric(cleaned, errors='coerce').fillna(0.0)
+
+def _to_date(series):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    # Cells may be real Excel dates or 'dd/mm/yyyy' text (sometimes followed by a time) depending on the export
+    is_text = series.map(lambda v: isinstance(v, str))
+    text_dates = series[is_text].str.extract(DATE_TEXT_PATTERN, expand=False)
+    parsed = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+    parsed[is_text] = pd.to_datetime(text_dates, format=DATE_FORMAT, errors='coerce')
+    parsed[~is_text] = pd.to_datetime(series[~is_text].where(series[~is_text].map(lambda v: isinstance(v, date))), errors='coerce')
+    return parsed
+
+def read_fees_excel(path, engine="auto"):
+    """
+    Reads one broker export with only the report columns, typed up front:
+    dates as datetime64, fee/amount columns as float64, names as str.
+    Raises SchemaError when a required column is missing.
+    """
+    if engine == "auto":
+        engine = pick_engine(path)
+    df = READERS[engine](path)
+    df.columns = [str(c).strip() for c in df.columns]
+
+    for col in OPTIONAL_COLUMNS:
+        if col not in df.columns:
+            df[col] = 0.0
+
+    for col in DATE_COLUMNS:
+        df[col] = _to_date(df[col])
+    for col in NUMERIC_COLUMNS:
+        df[col] = _to_number(df[col])
+    for col in TEXT_COLUMNS:
+        df[col] = df[col].where(df[col].notna(), None)
+
+    return df[REPORT_COLUMNS]
@@ -0,0 +1,69 @@
+import re
+import numpy as np
+import pandas as pd
+
+# ================================
+#   Rules
+# ================================
+# Matched against the security name in priority order: a name matching several rules gets the first one.
+# Amount source: "proceeds" rows are the charge itself; "commission" rows move money (a currency
+# conversion), so only their commission columns are the fee, never the converted principal.
+FEE_RULES = [
+    ("Management", "proceeds", ["דמי טיפול", "דמי טפול", "דמי ניהול", "Management Fee"]),
+    ("Custody", "proceeds", ["דמי משמרת", "דמי שמירה", "Custody"]),
+    ("FX_Conversion", "proceeds", ["עמלת המרה", "Conversion Fee"]),
+    ("FX_Conversion", "commission", ["המרת מט\"ח", "המרת מטבע", "FX Conversion", "Currency Conversion"]),
+    ("Dividend_Tax", "proceeds", ["מס על דיבידנד", "מס דיבידנד", "מס במקור", "Dividend Tax", "Withholding Tax"]),
+    ("Interest", "proceeds", ["ריבית חובה", "ריבית על יתרת חובה", "Debit Interest"]),
+]
+
+# Trade commissions come from the per-row commission columns, not from the security name
+TRADE_CATEGORY = "Trade_Commissions"
+BREAKDOWN_CATEGORIES = [TRADE_CATEGORY] + list(dict.fromkeys(category for category, _, _ in FEE_RULES))
+# Taxes and interest are shown in Fee_Breakdown but are not fees paid to the broker
+REPORTED_ONLY_CATEGORIES = ["Dividend_Tax", "Interest"]
+FEE_CATEGORIES = [c for c in BREAKDOWN_CATEGORIES if c not in REPORTED_ONLY_CATEGORIES]
+
+_RULE_PATTERNS = [re.compile("|".join(re.escape(p) for p in patterns), re.IGNORECASE) for _, _, patterns in FEE_RULES]
+
+# ================================
+#   Classification
+# ================================
+def match_rule(name):
+    """Index of the first rule in FEE_RULES that matches `name`, or -1."""
+    if isinstance(name, str):
+        for i, pattern in enumerate(_RULE_PATTERNS):
+            if pattern.search(name):
+                return i
+    return -1
+
+def _rules_per_row(names):
+    """
+    Rule index per row (-1 for non-fee rows).
+    Each distinct name is classified once and the result broadcast via the categorical codes,
+    so the cost grows with the number of unique names, not with the number of rows.
+    """
+    cat_names = names.astype('category')
+    rules = np.array([match_rule(n) for n in cat_names.cat.categories] + [-1], dtype=int)
+    # Missing names have code -1, which picks the trailing -1
+    return rules[cat_names.cat.codes.to_numpy()]
+
+def fee_amounts(df, name_col, amount_col, trade_fee_col):
+    """
+    Wide table with one ILS column per BREAKDOWN_CATEGORIES entry.
+    Name-based fees are the absolute proceeds of the row, except for "commission" rules,
+    whose commission columns move from Trade_Commissions to the rule's category.
+    """
+    rules = _rules_per_row(df[name_col])
+    amounts = pd.DataFrame(0.0, index=df.index, columns=BREAKDOWN_CATEGORIES)
+    amounts[TRADE_CATEGORY] = df[trade_fee_col].astype(float)
+
+    sources = {"proceeds": df[amount_col].abs(), "commission": df[trade_fee_col]}
+    for i, (category, source, _) in enumerate(FEE_RULES):
+        mask = rules == i
+        if not mask.any():
+            continue
+        amounts.loc[mask, category] += sources[source][mask]
+        if source == "commission":
+            amounts.loc[mask, TRADE_CATEGORY] = 0.0
+    return amounts
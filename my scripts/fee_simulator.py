@@ -0,0 +1,95 @@
+import numpy as np
+
+# ================================
+#   Settings
+# ================================
+HORIZONS_YEARS = [10, 20, 30]
+PERCENTILES = [5, 25, 50, 75, 95]
+DEFAULT_PATHS = 5000
+CHUNK_SIZE = 1000  # paths per chunk; bounds the (paths x months) matrix to ~3MB at 30 years
+SIMULATION_SEED = 42  # fixed so the numbers in the app don't jitter between runs
+MIN_HISTORY_MONTHS = 12
+
+# Annual fee % alternatives compared against the user's current (observed) fee level
+ALTERNATIVE_FEES = {"Zero_Fee": 0.0, "Index_ETF": 0.1, "Advisor": 1.0}
+
+# ================================
+#   Simulation
+# ================================
+def simulate_growth(monthly_returns_pct, fee_schedules, horizons_years=HORIZONS_YEARS, n_paths=DEFAULT_PATHS,
+                    seed=None, chunk_size=CHUNK_SIZE, embedded_fee_pct=0.0):
+    """
+    Bootstraps monthly returns into (paths x months) and returns the growth of 1 unit
+    at each horizon as an array shaped (schedules, paths, horizons).
+
+    `embedded_fee_pct` is the annual fee already netted out of the history (the user's own
+    returns), which is added back before each schedule is applied. All schedules share the
+    same draws, so differences between them are pure fee drag.
+    """
+    returns = np.asarray(monthly_returns_pct, dtype=float) / 100.0
+    log_gross = np.log1p(returns) - np.log1p(-embedded_fee_pct / 100.0 / 12)
+
+    horizon_months = np.asarray(horizons_years) * 12
+    months = int(horizon_months.max())
+    # A fixed monthly fee is a constant factor, so its log drag just scales with elapsed months
+    log_fee = np.log1p(-np.asarray(list(fee_schedules.values()), dtype=float) / 100.0 / 12)
+    fee_drag = log_fee[:, None] * horizon_months[None, :]  # (schedules, horizons)
+
+    rng = np.random.default_rng(seed)
+    growth = np.empty((len(log_fee), n_paths, len(horizon_months)))
+    for start in range(0, n_paths, chunk_size):
+        n = min(chunk_size, n_paths - start)
+        draws = log_gross[rng.integers(0, len(log_gross), size=(n, months))]  # (n, months)
+        cum = np.cumsum(draws, axis=1)[:, horizon_months - 1]                  # (n, horizons)
+        growth[:, start:start + n, :] = np.exp(cum[None, :, :] + fee_drag[:, None, :])
+    return growth
+
+def fee_cost_percent(fee_schedules, horizons_years=HORIZONS_YEARS):
+    """Share of final wealth lost to each schedule vs paying nothing; path-independent for a flat % fee."""
+    fees = np.asarray(list(fee_schedules.values()), dtype=float) / 100.0 / 12
+    kept = (1 - fees)[:, None] ** (np.asarray(horizons_years) * 12)[None, :]
+    return {name: {f"{h}Y": round(float((1 - kept[s, i]) * 100), 2) for i, h in enumerate(horizons_years)}
+            for s, name in enumerate(fee_schedules)}
+
+def percentile_bands(growth, fee_schedules, horizons_years=HORIZONS_YEARS, percentiles=PERCENTILES):
+    """{schedule: {"10Y": [p5, p25, ...]}} from a (schedules, paths, horizons) growth array."""
+    bands = np.percentile(growth, percentiles, axis=1)  # (percentiles, schedules, horizons)
+    return {name: {f"{h}Y": [round(float(v), 3) for v in bands[:, s, i]] for i, h in enumerate(horizons_years)}
+            for s, name in enumerate(fee_schedules)}
+
+def run_fee_simulation(user_returns_pct, benchmark_returns_pct, current_fee_pct, n_paths=DEFAULT_PATHS,
+                       seed=SIMULATION_SEED, horizons_years=HORIZONS_YEARS):
+    """
+    Projects the user's history and each benchmark under the current fee level and the alternatives.
+    Returns None when there is too little history to bootstrap from.
+    """
+    if len(user_returns_pct) < MIN_HISTORY_MONTHS:
+        print(f"   ⚠️ Skipping fee simulation: need {MIN_HISTORY_MONTHS}+ months of history.")
+        return None
+
+    print(f"⏳ Simulating {n_paths} paths x {max(horizons_years)} years of fee drag...")
+    schedules = {"Current": round(float(current_fee_pct), 3), **ALTERNATIVE_FEES}
+    series = {"User": (user_returns_pct, current_fee_pct)}
+    for name, returns in benchmark_returns_pct.items():
+        if len(returns) >= MIN_HISTORY_MONTHS:
+            series[name] = (returns, 0.0)  # index returns are gross
+
+    result = {
+        "Horizons_Years": list(horizons_years),
+        "Percentiles": PERCENTILES,
+        "Paths": n_paths,
+        "Seed": seed,
+        "Fee_Schedules": schedules,
+        "Fee_Cost_Percent": fee_cost_percent(schedules, horizons_years),
+        "Growth_Bands": {},
+    }
+    for i, (name, (returns, embedded_fee)) in enumerate(series.items()):
+        # Separate, reproducible stream per series
+        growth = simulate_growth(returns, schedules, horizons_years, n_paths,
+                                 seed=None if seed is None else seed + i, embedded_fee_pct=embedded_fee)
+        result["Growth_Bands"][name] = percentile_bands(growth, schedules, horizons_years)
+
+    last = f"{max(horizons_years)}Y"
+    median = result["Growth_Bands"]["User"]["Current"][last][PERCENTILES.index(50)]
+    print(f"   ✅ Median {last} growth at current fees: {median}x ({result['Fee_Cost_Percent']['Current'][last]}% lost to fees)")
+    return result
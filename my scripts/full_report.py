@@ -1,12 +1,18 @@
 import json
 import os
 import shutil
+import argparse
 import pandas as pd
 import yfinance as yf
 import requests
 import firebase_admin
 from firebase_admin import credentials, firestore
 from datetime import datetime
+from fee_classifier import fee_amounts, FEE_CATEGORIES, BREAKDOWN_CATEGORIES
+from fx_rates import get_fx_rates, attach_fx_rate, ils_to_usd, usd_adjusted_return, month_end
+from payload_format import encode_payload, PAYLOAD_FORMATS
+from fee_simulator import run_fee_simulation
+from risk_analytics import compute_risk_tables
 
 # ================================
 #   Settings & Paths
@@ -19,6 +25,18 @@ TRANS_FILE = os.path.join(TEMP_DIR, "all_transactions.json")
 
 # Ensure this matches your actual key file name
 FIREBASE_KEY_FILE = os.path.join(BASE_DIR, "myinvestmentstatus-6cd1e-firebase-adminsdk-fbsvc-b032b1cb8e.json")
+DEFAULT_PORTFOLIO_ID = "MjoPi7mrlERKoVDCMhzjzuxgN4F2"
+
+BENCHMARK_START_YEAR = 2023
+# Benchmark universe for the monthly comparison and the risk tables (all USD-quoted,
+# matching the USD view of the user's returns). SPX/NDX also feed Monthly_Data.
+BENCHMARK_TICKERS = {
+    "SPX": "^GSPC",
+    "NDX": "^NDX",
+    "ACWI": "ACWI",  # MSCI All Country World
+    "EIS": "EIS",    # MSCI Israel
+}
+FX_HISTORY_START = "2014-01-01"  # Oldest broker history we scrape; the FX cache makes this cheap after the first run
 
 hebrew_months = {
     "ינואר": 1, "פברואר": 2, "מרץ": 3, "אפריל": 4, "מאי": 5, "יוני": 6,
@@ -54,9 +72,9 @@ def get_cnn_fear_greed_index():
     
     return 27 # Fallback to the value you saw if live fetch fails
 
-def get_benchmarks_data(start_year=2023):
+def get_benchmarks_data(start_year=2023, tickers=None):
     print("⏳ Fetching real monthly benchmark data from Yahoo Finance...")
-    tickers = {"SPX": "^GSPC", "NDX": "^NDX"}
+    tickers = tickers or BENCHMARK_TICKERS
     
     annual_data = {}
     monthly_data = {} 
@@ -71,13 +89,12 @@ def get_benchmarks_data(start_year=2023):
         for index, row in pct_change.iterrows():
             year = index.year
             month = index.month
-            spx_val = row.get(tickers["SPX"], 0.0)
-            ndx_val = row.get(tickers["NDX"], 0.0)
-
-            monthly_data[(year, month)] = {
-                "SPX": round(spx_val if pd.notnull(spx_val) else 0.0, 2),
-                "NDX": round(ndx_val if pd.notnull(ndx_val) else 0.0, 2)
-            }
+            monthly_data[(year, month)] = {}
+            for name, ticker in tickers.items():
+                # Missing months (first pct_change row, late listings, failed tickers) stay NaN here;
+                # only the app's display fields turn them into 0
+                val = row.get(ticker, float('nan'))
+                monthly_data[(year, month)][name] = round(val, 2) if pd.notnull(val) else float('nan')
 
         # 2. Calculate Accurate YTD for Current Year
         # Get the last available closing price
@@ -91,11 +108,8 @@ def get_benchmarks_data(start_year=2023):
             ytd = ((current_price / last_close_prev_year) - 1) * 100
             
             current_year = datetime.now().year
-            annual_data[current_year] = {
-                "SPX": round(ytd[tickers["SPX"]], 2),
-                "NDX": round(ytd[tickers["NDX"]], 2)
-            }
-            print(f"   ✅ Calculated YTD: SPX {annual_data[current_year]['SPX']}%, NDX {annual_data[current_year]['NDX']}%")
+            annual_data[current_year] = {name: round(ytd[ticker], 2) for name, ticker in tickers.items()}
+            print("   ✅ Calculated YTD: " + ", ".join(f"{name} {val}%" for name, val in annual_data[current_year].items()))
         else:
             print("   ⚠️ Could not calculate YTD, missing previous year data.")
 
@@ -118,18 +132,31 @@ def parse_date_parts(date_str):
         return int(parts[1]), int(parts[2])
     except: return 0, 0
 
-def main():
-    if not os.path.exists(YIELDS_FILE) or not os.path.exists(TRANS_FILE):
-        print("❌ Error: JSON files not found in temp.")
-        return
+def fetch_market_data():
+    """Everything that is the same for every portfolio, fetched once per run."""
+    annual_benchmarks, monthly_benchmarks = get_benchmarks_data(start_year=BENCHMARK_START_YEAR)
+    return {
+        "annual_benchmarks": annual_benchmarks,
+        "monthly_benchmarks": monthly_benchmarks,
+        "fear_greed": get_cnn_fear_greed_index(),
+        "fx_rates": get_fx_rates(start=FX_HISTORY_START),
+    }
+
+def load_inputs(yields_file, trans_file):
+    if not os.path.exists(yields_file) or not os.path.exists(trans_file):
+        print(f"❌ Error: JSON files not found ({yields_file}, {trans_file}).")
+        return None, None
 
     print("📂 Loading Data...")
-    with open(YIELDS_FILE, 'r', encoding='utf-8') as f: yields_data = json.load(f)
-    with open(TRANS_FILE, 'r', encoding='utf-8') as f: trans_data = json.load(f)
+    with open(yields_file, 'r', encoding='utf-8') as f: yields_data = json.load(f)
+    with open(trans_file, 'r', encoding='utf-8') as f: trans_data = json.load(f)
+    return yields_data, trans_data
 
-    # 1. Fetch Real Data
-    annual_benchmarks, monthly_benchmarks = get_benchmarks_data(start_year=2023)
-    current_fear_greed = get_cnn_fear_greed_index()
+def build_report(yields_data, trans_data, market):
+    """Pure aggregation: raw scraped data + shared market data -> the document uploaded for one portfolio."""
+    # 1. Market Data (fetched once by the caller)
+    monthly_benchmarks = market["monthly_benchmarks"]
+    current_fear_greed = market["fear_greed"]
 
     # 2. Process Yields
     df_yields = pd.DataFrame(yields_data)
@@ -138,6 +165,8 @@ def main():
     df_yields['Year'] = df_yields['Year'].astype(int)
     df_yields['AccountValue'] = df_yields['AccountValue'].apply(clean_num)
     df_yields['NominalReturn'] = df_yields['NominalReturn'].apply(clean_num)
+    df_yields['MonthEnd'] = month_end(df_yields['Year'], df_yields['MonthNum']).values
+    df_yields['PrevMonthEnd'] = df_yields['MonthEnd'] - pd.offsets.MonthEnd(1)
 
     user_yearly_returns = {}
     for year, group in df_yields.groupby('Year'):
@@ -148,20 +177,44 @@ def main():
     # 3. Process Transactions
     df_trans = pd.DataFrame(trans_data)
     df_trans[['MonthNum', 'RealYear']] = df_trans['תאריך'].apply(lambda x: pd.Series(parse_date_parts(x)))
+    df_trans['TradeDate'] = pd.to_datetime(df_trans['תאריך'], format='%d/%m/%Y', errors='coerce')
     
     # Clean Numbers
     df_trans['Commission'] = df_trans['עמלת פעולה'].apply(clean_num)
     df_trans['OtherFees'] = df_trans['עמלות נלוות'].apply(clean_num)
     df_trans['TotalTradeFees'] = df_trans['Commission'] + df_trans['OtherFees']
     
-    # --- FEE FILTER ---
-    # Only counts explicit management fees
-    df_trans['IsMgmtFee'] = df_trans['שם נייר'].str.contains('דמי טיפול|דמי ניהול|Management Fee', na=False)
-    df_trans['MgmtFeeAmount'] = df_trans.apply(lambda x: abs(clean_num(x['תמורה בשקלים'])) if x['IsMgmtFee'] else 0, axis=1)
+    df_trans['Proceeds'] = df_trans['תמורה בשקלים'].apply(clean_num)
+    
+    # --- FEE CLASSIFICATION ---
+    # Rule-based, one pass per distinct security name (see fee_classifier.py)
+    fee_table = fee_amounts(df_trans, 'שם נייר', 'Proceeds', 'TotalTradeFees')
+    fee_cols = [f"Fee_{c}" for c in BREAKDOWN_CATEGORIES]
+    df_trans[fee_cols] = fee_table.to_numpy()
+    df_trans['MgmtFeeAmount'] = fee_table['Management']
 
     fees_by_year = df_trans.groupby('RealYear')[['TotalTradeFees', 'MgmtFeeAmount']].sum()
 
-    # 4. Build Monthly Data
+    # 4. Currency Normalization (ILS -> USD)
+    # Benchmarks are USD indices, so every ILS figure also gets a USD view.
+    fx_rates = market["fx_rates"]
+
+    df_yields = attach_fx_rate(df_yields, 'MonthEnd', fx_rates, rate_col='FxEnd')
+    df_yields = attach_fx_rate(df_yields, 'PrevMonthEnd', fx_rates, rate_col='FxStart')
+    df_yields['AccountValueUSD'] = ils_to_usd(df_yields['AccountValue'], df_yields['FxEnd'])
+    df_yields['NominalReturnUSD'] = usd_adjusted_return(df_yields['NominalReturn'], df_yields['FxStart'], df_yields['FxEnd'])
+
+    df_trans = attach_fx_rate(df_trans, 'TradeDate', fx_rates, rate_col='FxRate')
+    # Taxes and interest stay out of the fee total; they're only listed in Fee_Breakdown
+    df_trans['TotalFees'] = fee_table[FEE_CATEGORIES].sum(axis=1)
+    df_trans['TotalFeesUSD'] = ils_to_usd(df_trans['TotalFees'], df_trans['FxRate'])
+
+    # Fees with no FX rate (empty cache, trades before the first cached day) make the month's USD total unknown, not $0
+    df_trans['FeesUnconverted'] = df_trans['TotalFees'].ne(0) & df_trans['TotalFeesUSD'].isna()
+    fees_by_month = df_trans.groupby(['RealYear', 'MonthNum'])[['TotalFees', 'TotalFeesUSD', 'FeesUnconverted'] + fee_cols].sum()
+    fees_by_month.loc[fees_by_month['FeesUnconverted'] > 0, 'TotalFeesUSD'] = float('nan')
+
+    # 5. Build Monthly Data
     monthly_details = []
     all_years = sorted(list(set(list(user_yearly_returns.keys()) + list(fees_by_year.index))))
     current_years_desc = sorted([y for y in all_years if y > 0], reverse=True)
@@ -169,38 +222,76 @@ def main():
     for year in current_years_desc:
         for m in range(12, 0, -1):
             yield_row = df_yields[(df_yields['Year'] == year) & (df_yields['MonthNum'] == m)]
-            mask = (df_trans['RealYear'] == year) & (df_trans['MonthNum'] == m)
-            m_fees = df_trans[mask]['TotalTradeFees'].sum() + df_trans[mask]['MgmtFeeAmount'].sum()
+            m_fee_row = fees_by_month.loc[(year, m)] if (year, m) in fees_by_month.index else None
+            m_fees = m_fee_row['TotalFees'] if m_fee_row is not None else 0.0
+            m_fees_usd = m_fee_row['TotalFeesUSD'] if m_fee_row is not None else 0.0
             
             if not yield_row.empty or m_fees > 0:
                 user_ret = yield_row['NominalReturn'].values[0] if not yield_row.empty else 0.0
                 acc_val = yield_row['AccountValue'].values[0] if not yield_row.empty else 0.0
+                user_ret_usd = yield_row['NominalReturnUSD'].values[0] if not yield_row.empty else 0.0
+                acc_val_usd = yield_row['AccountValueUSD'].values[0] if not yield_row.empty else 0.0
+                fx_rate = yield_row['FxEnd'].values[0] if not yield_row.empty else float('nan')
                 h_month = [k for k,v in hebrew_months.items() if v == m][0]
                 
-                bench_month = monthly_benchmarks.get((year, m), {"SPX": 0.0, "NDX": 0.0})
+                bench_month = {k: v if pd.notnull(v) else 0.0 for k, v in monthly_benchmarks.get((year, m), {}).items()}
 
                 monthly_details.append({
                     "Year": int(year),
                     "Month": h_month,
                     "User_Monthly_Return": float(user_ret),
-                    "Fees_Paid_This_Month": round(m_fees, 2),
+                    "Fees_Paid_This_Month": round(float(m_fees), 2),
+                    "Fee_Breakdown": {c: round(float(m_fee_row[f"Fee_{c}"]), 2) if m_fee_row is not None else 0.0 for c in BREAKDOWN_CATEGORIES},
                     "Account_Value": float(acc_val),
+                    # USD VIEW (comparable with the USD benchmarks)
+                    "User_Monthly_Return_USD": round(float(user_ret_usd), 2) if pd.notnull(user_ret_usd) else None,
+                    "Fees_Paid_This_Month_USD": round(float(m_fees_usd), 2) if pd.notnull(m_fees_usd) else None,
+                    "Account_Value_USD": round(float(acc_val_usd), 2) if pd.notnull(acc_val_usd) else None,
+                    "USDILS_Rate": round(float(fx_rate), 4) if pd.notnull(fx_rate) else None,
                     # INJECT REAL BENCHMARK MONTHLY DATA
-                    "SPX_Monthly_Return": bench_month["SPX"],
-                    "NDX_Monthly_Return": bench_month["NDX"]
+                    "SPX_Monthly_Return": bench_month.get("SPX", 0.0),
+                    "NDX_Monthly_Return": bench_month.get("NDX", 0.0)
                 })
 
-    # 5. Final Output
+    # 6. Fee Drag Projection
+    # Current fee level = last 12 months of fees over the average account value (same basis as the app)
+    # Fee-only months carry no account value, so they're left out of the average
+    last_12 = monthly_details[:12]
+    valued = [m["Account_Value"] for m in last_12 if m["Account_Value"] > 0]
+    avg_value = sum(valued) / len(valued) if valued else 0.0
+    current_fee_pct = sum(m["Fees_Paid_This_Month"] for m in last_12) / avg_value * 100 if avg_value > 0 else 0.0
+
+    chrono_yields = df_yields.sort_values(['Year', 'MonthNum'])
+    chrono_benchmarks = [monthly_benchmarks[k] for k in sorted(monthly_benchmarks)]
+    fee_simulation = run_fee_simulation(
+        chrono_yields['NominalReturn'].to_numpy(),
+        {name: [b[name] for b in chrono_benchmarks if pd.notnull(b.get(name))] for name in ("SPX", "NDX")},
+        current_fee_pct,
+    )
+
+    # 7. Relative Risk vs the Benchmark Universe
+    # Benchmarks are USD-quoted, so use the USD view; fall back to ILS only if no FX rates exist
+    by_month = df_yields.set_index(['Year', 'MonthNum'])
+    risk_basis = "USD" if by_month['NominalReturnUSD'].notna().any() else "ILS"
+    risk_tables = compute_risk_tables(by_month['NominalReturnUSD' if risk_basis == "USD" else 'NominalReturn'], monthly_benchmarks)
+    if risk_tables:
+        risk_tables["Basis"] = risk_basis
+
+    # 8. Final Output
     final_output = {
         "Fear_Greed_Score": current_fear_greed, # Explicitly adding this to root
         "Monthly_Data": monthly_details,
-        "Transactions": trans_data
+        "Transactions": trans_data,
+        "Fee_Simulation": fee_simulation,
+        "Risk_Analytics": risk_tables
     }
+    return final_output
 
-    # Upload
+def upload_report(final_output, portfolio_id):
+    """Returns True on success, so callers decide what to clean up."""
     if not os.path.exists(FIREBASE_KEY_FILE):
         print(f"❌ Error: Key not found: {FIREBASE_KEY_FILE}")
-        return
+        return False
 
     try:
         if not firebase_admin._apps:
@@ -208,17 +299,36 @@ def main():
             firebase_admin.initialize_app(cred)
         
         db = firestore.client()
-        print(f"☁️ Uploading portfolio data to Firebase...")
-        db.collection('portfolio').document('MjoPi7mrlERKoVDCMhzjzuxgN4F2').set(final_output)
+        print(f"☁️ Uploading portfolio data to Firebase ({portfolio_id})...")
+        db.collection('portfolio').document(portfolio_id).set(final_output)
         print("✅ Upload Successful!")
+        return True
         
+    except Exception as e:
+        print(f"❌ Upload Failed: {e}")
+        return False
+
+def add_payload_arg(parser):
+    parser.add_argument("--payload-format", choices=PAYLOAD_FORMATS, default="rows",
+                        help="rows = legacy app format, columnar = compact v2, both = v2 plus the legacy rows.")
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_payload_arg(parser)
+    args = parser.parse_args()
+
+    yields_data, trans_data = load_inputs(YIELDS_FILE, TRANS_FILE)
+    if yields_data is None:
+        return
+
+    final_output = build_report(yields_data, trans_data, fetch_market_data())
+    final_output = encode_payload(final_output, args.payload_format)
+
+    if upload_report(final_output, DEFAULT_PORTFOLIO_ID):
         print("🧹 Cleaning temp...")
         if os.path.exists(TEMP_DIR):
             shutil.rmtree(TEMP_DIR)
         print("✅ Done.")
-        
-    except Exception as e:
-        print(f"❌ Upload Failed: {e}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,149 @@
+import os
+import pandas as pd
+import yfinance as yf
+from datetime import datetime, timedelta
+from local_state import state_path
+
+# ================================
+#   Settings & Paths
+# ================================
+CACHE_DIR = state_path("fx")
+FX_CACHE_FILE = os.path.join(CACHE_DIR, "fx_usdils.csv")
+
+FX_TICKER = "ILS=X"  # Yahoo quote: ILS per 1 USD
+RATE_COL = "USDILS"
+
+# Point this at a CSV with 'Date,USDILS' columns to work fully offline (tests, no network)
+FX_OFFLINE_FILE = os.environ.get("FX_OFFLINE_FILE", "")
+
+# ================================
+#   Sources
+# ================================
+def yahoo_source(start, end=None):
+    """Daily USD/ILS closes from Yahoo Finance."""
+    data = yf.download(FX_TICKER, start=start, end=end, interval="1d", progress=False)['Close']
+    if isinstance(data, pd.DataFrame):
+        data = data.iloc[:, 0]
+    return pd.DataFrame({"Date": data.index, RATE_COL: data.values})
+
+def file_source(path):
+    """Returns a source that reads rates from a local CSV instead of the network."""
+    def _read(start, end=None):
+        df = pd.read_csv(path, parse_dates=["Date"])
+        mask = df["Date"] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= df["Date"] < pd.Timestamp(end)
+        return df.loc[mask, ["Date", RATE_COL]]
+    return _read
+
+def default_source():
+    if FX_OFFLINE_FILE:
+        return file_source(FX_OFFLINE_FILE)
+    return yahoo_source
+
+# ================================
+#   Cache
+# ================================
+def _normalize(df):
+    df = df.dropna(subset=[RATE_COL]).copy()
+    df["Date"] = pd.to_datetime(df["Date"]).dt.tz_localize(None).dt.normalize()
+    df[RATE_COL] = df[RATE_COL].astype(float)
+    return df.drop_duplicates("Date", keep="last").sort_values("Date").reset_index(drop=True)
+
+def load_cached_rates(cache_file=FX_CACHE_FILE):
+    if not os.path.exists(cache_file):
+        return pd.DataFrame({"Date": pd.Series(dtype="datetime64[ns]"), RATE_COL: pd.Series(dtype=float)})
+    return _normalize(pd.read_csv(cache_file, parse_dates=["Date"]))
+
+def save_cached_rates(df, cache_file=FX_CACHE_FILE):
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    tmp_file = cache_file + ".tmp"
+    df.to_csv(tmp_file, index=False, date_format="%Y-%m-%d")
+    os.replace(tmp_file, cache_file)
+
+def get_fx_rates(start, source=None, cache_file=FX_CACHE_FILE):
+    """
+    Returns the daily USD/ILS table covering `start` until today.
+    Only the gaps before the first and after the last cached day are fetched;
+    if the source fails we carry on with whatever the cache already has.
+    """
+    print("⏳ Loading USD/ILS rates...")
+    source = source or default_source()
+    start = pd.Timestamp(start).normalize()
+    cached = load_cached_rates(cache_file)
+
+    ranges = []
+    if cached.empty:
+        ranges.append((start, None))
+    else:
+        first, last = cached["Date"].iloc[0], cached["Date"].iloc[-1]
+        if start < first:
+            ranges.append((start, first))
+        # Refetch the last cached day too, in case it was captured intraday
+        if last.date() < datetime.now().date():
+            ranges.append((last, None))
+
+    fetched = []
+    for range_start, range_end in ranges:
+        try:
+            chunk = source(range_start.strftime("%Y-%m-%d"), range_end.strftime("%Y-%m-%d") if range_end is not None else None)
+            fetched.append(chunk)
+        except Exception as e:
+            print(f"   ⚠️ FX fetch failed ({e}). Using cached rates.")
+
+    if fetched:
+        rates = _normalize(pd.concat([cached] + fetched, ignore_index=True))
+        if len(rates) != len(cached):
+            save_cached_rates(rates, cache_file)
+            print(f"   ✅ FX cache updated: {len(rates) - len(cached)} new days ({len(rates)} total)")
+        else:
+            print(f"   ✅ FX cache up to date ({len(rates)} days)")
+    else:
+        rates = cached
+
+    if rates.empty:
+        print("   ⚠️ No FX rates available. USD figures will be empty.")
+    return rates
+
+# ================================
+#   Conversion
+# ================================
+def attach_fx_rate(df, date_col, rates, rate_col=RATE_COL):
+    """
+    Adds the last known USD/ILS rate on or before `date_col` to every row.
+    Single as-of join instead of a per-row lookup; the original row order is kept.
+    """
+    out = df.copy()
+    if rates.empty:
+        out[rate_col] = float('nan')
+        return out
+
+    # Both keys need the same datetime resolution for merge_asof
+    keys = pd.DataFrame({"_row": range(len(out)), "Date": pd.to_datetime(out[date_col]).astype("datetime64[ns]").values})
+    right = rates[["Date", RATE_COL]].rename(columns={RATE_COL: rate_col})
+    right["Date"] = right["Date"].astype("datetime64[ns]")
+    valid = keys["Date"].notna()
+    joined = pd.merge_asof(
+        keys[valid].sort_values("Date"),
+        right,
+        on="Date",
+        direction="backward",
+    ).set_index("_row")[rate_col]
+
+    out[rate_col] = joined.reindex(keys["_row"]).values
+    return out
+
+def ils_to_usd(amounts, rates_col):
+    return amounts / rates_col
+
+def usd_adjusted_return(ils_return_pct, rate_start, rate_end):
+    """Converts an ILS period return (%) into the USD return for the same period."""
+    return ((1 + ils_return_pct / 100.0) * (rate_start / rate_end) - 1) * 100.0
+
+def month_end(year, month):
+    return pd.to_datetime(pd.DataFrame({"year": year, "month": month, "day": 1})) + pd.offsets.MonthEnd(0)
+
+if __name__ == "__main__":
+    rates = get_fx_rates(start=datetime.now() - timedelta(days=365 * 12))
+    if not rates.empty:
+        print(rates.tail())
@@ -1,12 +1,15 @@
-import os, time, shutil, hashlib, logging
+import os, sys, time, argparse, shutil, hashlib, logging
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, NoSuchElementException, StaleElementReferenceException
+from checkpoint import CheckpointJournal
+from local_state import state_path
+from scrape_history import FEES_MANIFEST_FILE, add_refresh_arg, load_history, years_to_fetch, archive_fees_file, restore_fees_file
+from browser_profile import add_browser_args, build_chrome_options, apply_resource_blocking, allow_downloads, profile_mode, RunTimer
 
 # ================================
 #   CONFIG & CREDENTIALS
@@ -24,7 +27,11 @@ TARGET_DIR = os.path.join(current_script_dir, "temp")
 # --- CHANGE END ---
 
 LOG_DIR = os.path.join(TARGET_DIR, "logs")
-YEARS = [2024, 2023, 2022, 2021, 2020, 2019, 2018, 2017, 2016, 2015, 2014]
+# Per-export progress, so a crash mid-run resumes from the first missing file (not in temp, which the report wipes)
+CHECKPOINT_FILE = state_path("checkpoints", "fees_journal.json")
+CURRENT_YEAR_FILE = "Fees_CurrentYear.xlsx"
+# Previous years are read from the site's dropdown and remembered here between resumes
+YEARS_UNIT = "years_list"
 
 # Ensure the temp directory and logs directory exist
 os.makedirs(TARGET_DIR, exist_ok=True)
@@ -69,7 +76,7 @@ def move_excel_with_hash(target_name):
     if not downloaded_file:
         logging.error(f"❌ No Excel file found for {target_name}")
         print("   ❌ Error: No Excel file found in downloads folder")
-        return
+        return False
 
     src = os.path.join(DOWNLOAD_DIR, downloaded_file)
     dst = os.path.join(TARGET_DIR, target_name)
@@ -79,7 +86,7 @@ def move_excel_with_hash(target_name):
             logging.info(f"ℹ File {target_name} is identical. Skipping.")
             print(f"   ℹ File {target_name} is identical. Skipping.")
             os.remove(src)
-            return
+            return True
         else:
             logging.info(f"🔄 Updating {target_name}...")
             print(f"   🔄 Updating file: {target_name}")
@@ -88,6 +95,7 @@ def move_excel_with_hash(target_name):
     shutil.move(src, dst)
     logging.info(f"✅ Saved: {target_name}")
     print(f"   ✅ Successfully saved: {target_name} in {TARGET_DIR}")
+    return True
 
 def wait_for_loader(driver):
     """Waits for the spinner/loader to disappear"""
@@ -99,7 +107,7 @@ def wait_for_loader(driver):
     except:
         pass 
 
-def export_excel(target_name, driver):
+def export_excel(target_name, driver, year=None):
     logging.info(f"👉 Exporting: {target_name}")
     print(f"   📤 Attempting to export: {target_name}")
     
@@ -114,11 +122,34 @@ def export_excel(target_name, driver):
         excel_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "li.export.excel")))
         driver.execute_script("arguments[0].click();", excel_btn)
 
-        move_excel_with_hash(target_name)
+        if move_excel_with_hash(target_name):
+            journal.mark_done(target_name)
+            if year is not None:
+                archive_fees_file(os.path.join(TARGET_DIR, target_name), fees_history, year)
+            return True
 
     except Exception as e:
         logging.error(f"❌ Export failed for {target_name}: {e}")
         print(f"   ❌ Export failed: {e}")
+    return False
+
+def export_done(name):
+    """A journal entry only counts if its file is still on disk (full_report.py wipes 'temp')."""
+    if journal.is_done(name) and not os.path.exists(os.path.join(TARGET_DIR, name)):
+        journal.discard(name)
+    return journal.is_done(name)
+
+def pending_exports(names):
+    return [n for n in names if not export_done(n)]
+
+def plan_exports(years):
+    """
+    Copies closed years back from the local history into 'temp' and returns
+    the exports that still need the browser (current year + open years).
+    """
+    open_years = years_to_fetch(years, fees_history, args.full_refresh)
+    fetch_years = [y for y in years if y in open_years or not restore_fees_file(fees_history, y, TARGET_DIR)]
+    return [CURRENT_YEAR_FILE] + [f"Fees_{y}.xlsx" for y in fetch_years]
 
 # ================================
 #   MAIN
@@ -127,6 +158,23 @@ def export_excel(target_name, driver):
 print("--- Script Started ---")
 print(f"📂 Output Folder: {TARGET_DIR}")
 
+parser = argparse.ArgumentParser()
+add_refresh_arg(parser)
+add_browser_args(parser)
+args = parser.parse_args()
+fees_history = load_history(FEES_MANIFEST_FILE)
+journal = CheckpointJournal(CHECKPOINT_FILE)
+known_years = journal.get(YEARS_UNIT)
+
+all_exports = plan_exports(known_years) if known_years else None
+
+if all_exports:
+    if not pending_exports(all_exports):
+        print("♻️ All exports found in checkpoint/history. Skipping browser session.")
+        journal.clear()
+        sys.exit(0)
+    print(f"♻️ Resuming from checkpoint, still missing: {pending_exports(all_exports)}")
+
 if not MY_USERNAME:
     username_input = input("Username: ")
 else:
@@ -137,13 +185,10 @@ if not MY_PASSWORD:
 else:
     password_input = MY_PASSWORD
 
-# Chrome Options
-chrome_options = Options()
-script_profile_dir = os.path.join(TARGET_DIR, "chrome_profile_fees")
-os.makedirs(script_profile_dir, exist_ok=True)
-chrome_options.add_argument(f"--user-data-dir={script_profile_dir}")
-chrome_options.add_argument("--log-level=3") 
-chrome_options.add_argument("--silent")
+# Chrome Options (profile lives in the local state dir so it survives the temp cleanup)
+headless, block_resources = not args.headed, not args.no_block
+chrome_options = build_chrome_options("chrome_profile_fees", headless=headless, block_resources=block_resources)
+timer = RunTimer("import_fees_excels", profile_mode(headless, block_resources))
 
 # Critical settings for automatic downloads without prompt
 chrome_options.add_experimental_option("prefs", {
@@ -159,11 +204,16 @@ wait = WebDriverWait(driver, 60)
 short_wait = WebDriverWait(driver, 10)
 fast_wait = WebDriverWait(driver, 2)
 
-driver.maximize_window()
+allow_downloads(driver, DOWNLOAD_DIR)
+if block_resources:
+    apply_resource_blocking(driver)
+if not headless:
+    driver.maximize_window()
 
 try:
     print("🚀 Connecting to site...")
-    driver.get("https://sparkmeitav.ordernet.co.il/#/auth")
+    with timer.phase("login_page"):
+        driver.get("https://sparkmeitav.ordernet.co.il/#/auth")
     
     # --- Login ---
     try:
@@ -231,10 +281,14 @@ try:
 
     # A. Beginning of Year
     try:
-        print("📅 Selecting: Beginning of year")
-        select_option(filter_select_loc, "beginYear")
-        wait_for_loader(driver)
-        export_excel("Fees_CurrentYear.xlsx", driver)
+        if export_done(CURRENT_YEAR_FILE):
+            print(f"♻️ {CURRENT_YEAR_FILE} already exported (checkpoint)")
+        else:
+            print("📅 Selecting: Beginning of year")
+            select_option(filter_select_loc, "beginYear")
+            with timer.phase("grid_loads"):
+                wait_for_loader(driver)
+            export_excel(CURRENT_YEAR_FILE, driver)
     except Exception as e:
         print(f"❌ Error in beginning of year: {e}")
 
@@ -245,17 +299,35 @@ try:
         
         year_select_loc = (By.CSS_SELECTOR, "select[ng-model='accountTransactionsVM.selectedYear']")
 
-        for y in YEARS:
+        # Discover the years the site offers instead of a hard-coded list
+        el = wait.until(EC.presence_of_element_located(year_select_loc))
+        years = sorted({opt.text.strip() for opt in Select(el).options if opt.text.strip().isdigit()}, reverse=True)
+        print(f"   Found years: {years}")
+        journal.mark_done(YEARS_UNIT, years)
+
+        all_exports = plan_exports(years)
+        if not args.full_refresh:
+            print(f"   Open years to fetch: {[n for n in all_exports if n != CURRENT_YEAR_FILE]} (use --full-refresh to fetch all)")
+
+        for y in years:
+            if f"Fees_{y}.xlsx" not in all_exports:
+                print(f"   ♻️ Year {y} is closed, restored from history")
+                continue
+            if export_done(f"Fees_{y}.xlsx"):
+                print(f"   ♻️ Year {y} already exported (checkpoint)")
+                continue
+
             try:
                 print(f"   🔽 Loading year: {y}")
                 el = wait.until(EC.presence_of_element_located(year_select_loc))
                 select_year = Select(el)
-                select_year.select_by_visible_text(str(y))
+                select_year.select_by_visible_text(y)
                 
                 time.sleep(4)
-                wait_for_loader(driver)
+                with timer.phase("grid_loads"):
+                    wait_for_loader(driver)
                 
-                export_excel(f"Fees_{y}.xlsx", driver)
+                export_excel(f"Fees_{y}.xlsx", driver, year=y)
             
             except Exception as inner_e:
                 print(f"   ⚠️ Skipping year {y} (Error: {inner_e})")
@@ -264,6 +336,13 @@ try:
     except Exception as e:
         print(f"❌ General error in previous years: {e}")
 
+    # Without the years list we can't tell what's missing, so keep the journal
+    missing_exports = pending_exports(all_exports) if all_exports else [YEARS_UNIT]
+    if missing_exports:
+        print(f"⚠️ Exports still missing: {missing_exports}. Rerun to resume from checkpoint.")
+    else:
+        journal.clear()
+
 except Exception as main_e:
     print(f"🔥 Critical Error: {main_e}")
 
@@ -271,4 +350,6 @@ finally:
     print("✔ Script finished.")
     # input("Press Enter to exit...")  <-- DELETE OR COMMENT THIS OUT
     if 'driver' in locals():
-        driver.quit()
\ No newline at end of file
+        driver.quit()
+    if 'timer' in locals():
+        timer.report()
\ No newline at end of file
@@ -0,0 +1,13 @@
+import os
+
+# ================================
+#   CONFIG
+# ================================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Everything that has to survive between runs lives under one directory.
+# It sits outside 'temp' because full_report.py wipes 'temp' after every upload.
+STATE_DIR = os.path.join(BASE_DIR, "state")
+
+def state_path(*parts):
+    return os.path.join(STATE_DIR, *parts)
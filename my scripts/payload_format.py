@@ -0,0 +1,117 @@
+import sys
+import json
+import time
+
+# ================================
+#   Formats
+# ================================
+# v1 ("rows"):     Monthly_Data / Transactions as lists of dicts, what the current app reads
+# v2 ("columnar"): one array per field, repeated strings dictionary-encoded
+PAYLOAD_VERSION = 2
+PAYLOAD_FORMATS = ["rows", "columnar", "both"]
+
+ROW_SECTIONS = {
+    # row key -> (columnar key, dictionary-encoded fields)
+    "Monthly_Data": ("Monthly_Columns", ["Month"]),
+    "Transactions": ("Transactions_Columns", ["שם נייר", "SourceFile"]),
+}
+
+# ================================
+#   Encoding
+# ================================
+def dictionary_encode(values):
+    """['a', 'b', 'a'] -> (['a', 'b'], [0, 1, 0])"""
+    dictionary, index, codes = [], {}, []
+    for v in values:
+        if v not in index:
+            index[v] = len(dictionary)
+            dictionary.append(v)
+        codes.append(index[v])
+    return dictionary, codes
+
+def _columns(rows, fields):
+    columns = {}
+    for field in fields:
+        values = [row.get(field) for row in rows]
+        nested = [v for v in values if isinstance(v, dict)]
+        if nested and len(nested) == len(values):
+            # e.g. Fee_Breakdown: a map of arrays, since Firestore has no arrays of arrays
+            sub_fields = list(dict.fromkeys(k for v in nested for k in v))
+            columns[field] = _columns(values, sub_fields)
+        else:
+            columns[field] = values
+    return columns
+
+def rows_to_columns(rows, dict_fields=()):
+    fields = list(dict.fromkeys(k for row in rows for k in row))
+    columns = _columns(rows, fields)
+    dictionaries = {}
+    for field in dict_fields:
+        if field in columns:
+            dictionaries[field], columns[field] = dictionary_encode(columns[field])
+    return {"Length": len(rows), "Fields": fields, "Dictionaries": dictionaries, "Columns": columns}
+
+def _rows(columns, length):
+    rows = [{} for _ in range(length)]
+    for field, values in columns.items():
+        if isinstance(values, dict):
+            values = [dict(zip(values.keys(), parts)) for parts in zip(*values.values())] if values else [{}] * length
+        for row, v in zip(rows, values):
+            row[field] = v
+    return rows
+
+def columns_to_rows(table):
+    columns = dict(table["Columns"])
+    for field, dictionary in table["Dictionaries"].items():
+        columns[field] = [dictionary[code] for code in columns[field]]
+    ordered = {f: columns[f] for f in table["Fields"]}
+    return _rows(ordered, table["Length"])
+
+def encode_payload(report, payload_format="rows"):
+    """Returns the document to upload; 'rows' is the legacy report untouched."""
+    if payload_format not in PAYLOAD_FORMATS:
+        raise ValueError(f"Unknown payload format '{payload_format}', expected one of {PAYLOAD_FORMATS}")
+    if payload_format == "rows":
+        return report
+
+    payload = {k: v for k, v in report.items() if k not in ROW_SECTIONS}
+    payload["Payload_Version"] = PAYLOAD_VERSION
+    for row_key, (col_key, dict_fields) in ROW_SECTIONS.items():
+        if row_key in report:
+            payload[col_key] = rows_to_columns(report[row_key], dict_fields)
+            if payload_format == "both":
+                payload[row_key] = report[row_key]
+    return payload
+
+def decode_payload(payload):
+    """Any payload version -> the v1 row report."""
+    report = {k: v for k, v in payload.items() if k != "Payload_Version"}
+    for row_key, (col_key, _) in ROW_SECTIONS.items():
+        if col_key in report:
+            table = report.pop(col_key)
+            report.setdefault(row_key, columns_to_rows(table))
+    return report
+
+# ================================
+#   Benchmark
+# ================================
+def benchmark(report, repeat=20):
+    def timed(fn):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = fn()
+        return result, (time.perf_counter() - start) / repeat * 1000
+
+    print(f"{'format':<10} {'bytes':>10} {'dumps ms':>9} {'loads ms':>9} {'decode ms':>10}")
+    for payload_format in ["rows", "columnar"]:
+        payload, encode_ms = timed(lambda: encode_payload(report, payload_format))
+        text, dumps_ms = timed(lambda: json.dumps(payload, ensure_ascii=False, separators=(',', ':')))
+        loaded, loads_ms = timed(lambda: json.loads(text))
+        decoded, decode_ms = timed(lambda: decode_payload(loaded))
+        assert decoded == json.loads(json.dumps(report, ensure_ascii=False)), "round trip mismatch"
+        print(f"{payload_format:<10} {len(text.encode('utf-8')):>10,} {dumps_ms + encode_ms:>9.2f} {loads_ms:>9.2f} {decode_ms:>10.2f}")
+
+if __name__ == "__main__":
+    # Usage: python payload_format.py <report.json in any payload format>
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        benchmark(decode_payload(json.load(f)))
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# ================================
+#   Settings
+# ================================
+ROLLING_WINDOWS = [12, 36]  # months
+MIN_MONTHS = 12
+METRICS = ["Beta", "Alpha_Annual", "Tracking_Error", "Information_Ratio", "Correlation", "Up_Capture", "Down_Capture"]
+
+# ================================
+#   Alignment
+# ================================
+def align_returns(user_returns, monthly_benchmarks):
+    """
+    user_returns: Series of monthly % returns indexed by (year, month).
+    monthly_benchmarks: {(year, month): {name: %}} as returned by get_benchmarks_data.
+    Returns (periods, u (T,), B (T, K), names) over the user's months that have benchmark rows.
+    B keeps NaN where a benchmark has no return; risk_metrics masks those per benchmark.
+    """
+    bench = pd.DataFrame.from_dict(monthly_benchmarks, orient='index')
+    joined = pd.concat([user_returns.rename("_user"), bench], axis=1, join='inner')
+    joined = joined[joined["_user"].notna()].sort_index()
+    names = [c for c in joined.columns if c != "_user"]
+    periods = [f"{y}-{m:02d}" for y, m in joined.index]
+    return periods, joined["_user"].to_numpy(dtype=float), joined[names].to_numpy(dtype=float), names
+
+# ================================
+#   Metrics
+# ================================
+def risk_metrics(u, B, min_obs=MIN_MONTHS):
+    """
+    Batched over any leading dims: u (..., T), B (..., T, K) in monthly %.
+    Every metric comes back shaped (..., K), so all benchmarks and all windows
+    are one set of array operations. Each benchmark only uses the months where it has
+    a return (a late listing or failed download doesn't shorten the others), and
+    comes back NaN with fewer than `min_obs` of them.
+    """
+    u_b = np.broadcast_to(u[..., None], B.shape)  # (..., T, K)
+    valid = np.isfinite(u_b) & np.isfinite(B)
+    n = valid.sum(axis=-2)                        # (..., K)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mu_u = np.where(valid, u_b, 0).sum(axis=-2) / n
+        mu_b = np.where(valid, B, 0).sum(axis=-2) / n
+        uc = np.where(valid, u_b - mu_u[..., None, :], 0)
+        Bc = np.where(valid, B - mu_b[..., None, :], 0)
+
+        cov = (uc * Bc).sum(axis=-2) / (n - 1)
+        var_b = (Bc ** 2).sum(axis=-2) / (n - 1)
+        var_u = (uc ** 2).sum(axis=-2) / (n - 1)
+
+        # Active return u - B, already centred since uc - Bc subtracts both means
+        active_mean = mu_u - mu_b
+        tracking_error = np.sqrt(((uc - Bc) ** 2).sum(axis=-2) / (n - 1)) * np.sqrt(12)
+
+        up, down = valid & (B > 0), valid & (B < 0)
+        beta = cov / var_b
+        metrics = {
+            "Beta": beta,
+            "Alpha_Annual": (mu_u - beta * mu_b) * 12,
+            "Tracking_Error": tracking_error,
+            "Information_Ratio": active_mean * 12 / tracking_error,
+            "Correlation": cov / np.sqrt(var_u * var_b),
+            # Ratio of mean user return to mean benchmark return in the benchmark's up (down) months
+            "Up_Capture": (np.where(up, u_b, 0).sum(axis=-2) / np.where(up, B, 0).sum(axis=-2)) * 100,
+            "Down_Capture": (np.where(down, u_b, 0).sum(axis=-2) / np.where(down, B, 0).sum(axis=-2)) * 100,
+        }
+    enough = n >= max(min_obs, 2)
+    return {name: np.where(enough, values, np.nan) for name, values in metrics.items()}, n
+
+def _clean(values):
+    # NaN/inf aren't valid JSON/Firestore numbers
+    return [round(float(v), 3) if np.isfinite(v) else None for v in np.atleast_1d(values)]
+
+def compute_risk_tables(user_returns, monthly_benchmarks, windows=ROLLING_WINDOWS):
+    """Precomputed full-period and rolling risk tables for every configured benchmark."""
+    # get_benchmarks_data returns {} when Yahoo fails; the report must still go out without this section
+    if not monthly_benchmarks or not user_returns.index.isin(list(monthly_benchmarks)).any():
+        print("   ⚠️ Skipping risk analytics: no benchmark data for the user's months.")
+        return None
+
+    periods, u, B, names = align_returns(user_returns, monthly_benchmarks)
+    if len(u) < MIN_MONTHS:
+        print(f"   ⚠️ Skipping risk analytics: {len(u)} overlapping months, need {MIN_MONTHS}+.")
+        return None
+
+    print(f"⏳ Computing risk analytics vs {names} over {len(u)} months...")
+    full, observed = risk_metrics(u, B)
+    tables = {
+        "Benchmarks": names,
+        "Months": len(u),
+        "Start": periods[0],
+        "End": periods[-1],
+        "Full_Period": {name: {"Months": int(observed[k]), **{m: _clean(full[m][k])[0] for m in METRICS}}
+                        for k, name in enumerate(names)},
+        "Rolling": {},
+    }
+
+    for window in windows:
+        if len(u) < window:
+            continue
+        # (W, window) and (W, window, K): every window of every benchmark in one call
+        u_w = sliding_window_view(u, window)
+        B_w = sliding_window_view(B, window, axis=0).transpose(0, 2, 1)
+        rolled, _ = risk_metrics(u_w, B_w, min_obs=min(window, MIN_MONTHS))
+        tables["Rolling"][f"{window}M"] = {
+            "Period_End": periods[window - 1:],
+            **{name: {m: _clean(rolled[m][:, k]) for m in METRICS} for k, name in enumerate(names)},
+        }
+
+    return tables
@@ -1,8 +1,11 @@
 import threading
 import subprocess
+import argparse
 import sys
 import time
 import os
+from scrape_history import add_refresh_arg
+from browser_profile import add_browser_args
 
 # ================================
 #   CONFIG
@@ -12,12 +15,15 @@ SCRIPT_CONVERT_JSON = "convert_fees_excels_to_json.py"
 SCRIPT_EARNINGS = "earnings-loses.py"
 SCRIPT_REPORT = "full_report.py"
 
-def run_script(script_name):
+# Extra CLI flags forwarded to the two scrapers (e.g. --full-refresh, --headed)
+SCRAPER_ARGS = []
+
+def run_script(script_name, *args):
     """Helper to run a script and check for errors."""
     print(f"🔹 [START] {script_name}")
     try:
         # sys.executable ensures we use the same Python interpreter (venv/conda)
-        result = subprocess.run([sys.executable, script_name], check=True)
+        result = subprocess.run([sys.executable, script_name, *args], check=True)
         print(f"✅ [DONE] {script_name}")
         return True
     except subprocess.CalledProcessError as e:
@@ -26,16 +32,24 @@ def run_script(script_name):
 
 def pipeline_fees():
     """Branch A: Import Fees -> Convert to JSON"""
-    if run_script(SCRIPT_IMPORT_FEES):
+    if run_script(SCRIPT_IMPORT_FEES, *SCRAPER_ARGS):
         run_script(SCRIPT_CONVERT_JSON)
     else:
         print(f"⚠️ Skipping {SCRIPT_CONVERT_JSON} because import failed.")
 
 def pipeline_yields():
     """Branch B: Earnings/Loses"""
-    run_script(SCRIPT_EARNINGS)
+    run_script(SCRIPT_EARNINGS, *SCRAPER_ARGS)
 
 def main():
+    parser = argparse.ArgumentParser()
+    add_refresh_arg(parser)
+    add_browser_args(parser)
+    args = parser.parse_args()
+    for flag, enabled in [("--full-refresh", args.full_refresh), ("--headed", args.headed), ("--no-block", args.no_block)]:
+        if enabled:
+            SCRAPER_ARGS.append(flag)
+
     start_time = time.time()
     print("🚀 --- Starting Parallel Execution ---")
 
@@ -0,0 +1,71 @@
+import os, json, shutil
+from datetime import datetime
+from checkpoint import atomic_write_json
+from local_state import state_path
+
+# ================================
+#   CONFIG
+# ================================
+HISTORY_DIR = state_path("history")
+YIELDS_HISTORY_FILE = os.path.join(HISTORY_DIR, "yields_history.json")
+FEES_HISTORY_DIR = os.path.join(HISTORY_DIR, "fees")
+FEES_MANIFEST_FILE = os.path.join(FEES_HISTORY_DIR, "manifest.json")
+
+# ================================
+#   ARGS
+# ================================
+def add_refresh_arg(parser):
+    parser.add_argument("--full-refresh", action="store_true",
+                        help="Re-scrape every available year, ignoring the local history.")
+
+# ================================
+#   HISTORY
+# ================================
+def load_history(path):
+    """Returns {"years": {"<year>": {"scraped_at": iso-date, "data": ...}}}."""
+    if not os.path.exists(path):
+        return {"years": {}}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (ValueError, OSError) as e:
+        print(f"   ⚠️ Ignoring unreadable history {os.path.basename(path)}: {e}")
+        return {"years": {}}
+
+def record_year(path, history, year, data=None):
+    history["years"][str(year)] = {"scraped_at": datetime.now().isoformat(timespec="seconds"), "data": data}
+    atomic_write_json(path, history)
+
+def is_year_finalized(history, year):
+    """
+    A year is closed once it is in the past AND our copy was taken after it ended,
+    so a December scraped mid-month is still fetched again in January.
+    """
+    entry = history["years"].get(str(year))
+    if not entry or int(year) >= datetime.now().year:
+        return False
+    return datetime.fromisoformat(entry["scraped_at"]).year > int(year)
+
+def years_to_fetch(available_years, history, full_refresh=False):
+    if full_refresh:
+        return list(available_years)
+    return [y for y in available_years if not is_year_finalized(history, y)]
+
+# ================================
+#   FEES FILES
+# ================================
+def archive_fees_file(src_path, history, year):
+    """Keeps a copy of a yearly export outside 'temp' and records when it was taken."""
+    os.makedirs(FEES_HISTORY_DIR, exist_ok=True)
+    name = os.path.basename(src_path)
+    shutil.copy2(src_path, os.path.join(FEES_HISTORY_DIR, name))
+    record_year(FEES_MANIFEST_FILE, history, year, name)
+
+def restore_fees_file(history, year, target_dir):
+    """Copies an archived yearly export back into 'temp'. Returns False if it's gone."""
+    entry = history["years"].get(str(year))
+    src = os.path.join(FEES_HISTORY_DIR, entry["data"]) if entry else None
+    if not src or not os.path.exists(src):
+        return False
+    shutil.copy2(src, os.path.join(target_dir, entry["data"]))
+    return True